@@ -1,12 +1,24 @@
 import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 import duckdb
-import pandas as pd
+
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+if not logging.getLogger().handlers:
+    logging.basicConfig(level=logging.INFO)
 
 raw_data_files = {
     # no need to process contact suplier because it is part of contacts
     "contacts": {
         "file_path": "data/contacts-20230414T185305.csv",
+        # Pinned so the active filter always sees a real boolean column and
+        # never falls back to string comparisons.
+        "dtypes": {"isActive": "BOOLEAN"},
         "transformation_config": {
             "duplicates_subset": ["type", "company", "firstName"],
             "fillna_value": "Unknown",
@@ -35,87 +47,197 @@ raw_data_files = {
 class ETLPipeline:
     """ETL Pipeline for processing various CSV files."""
 
-    def __init__(self):
-        """Initialize the ETL Pipeline with a database connection and logging."""
-        self.con = duckdb.connect(database="mydata.db", read_only=False)
-        logging.basicConfig(level=logging.INFO)
+    def __init__(self, con: Optional[duckdb.DuckDBPyConnection] = None):
+        """Initialize the ETL Pipeline.
 
-    def _extract(self, file_path: str) -> pd.DataFrame:
+        Args:
+            con: Existing DuckDB connection to use; when omitted, a connection
+                to the database file is opened lazily on first use.
+        """
+        self.database = "mydata.db"
+        self._con = con
+
+    @property
+    def con(self) -> duckdb.DuckDBPyConnection:
+        """Database connection, opened on first access if none was provided."""
+        if self._con is None:
+            self._con = duckdb.connect(database=self.database, read_only=False)
+            # Row order carries no meaning for these tables; dropping it lets
+            # the CSV scan stream into table writes fully in parallel.
+            self._con.execute("SET preserve_insertion_order = false")
+        return self._con
+
+    @con.setter
+    def con(self, con: duckdb.DuckDBPyConnection) -> None:
+        self._con = con
+
+    def _extract(
+        self,
+        file_path: str,
+        con: Optional[duckdb.DuckDBPyConnection] = None,
+        dtypes: Optional[dict] = None,
+        usecols: Optional[list] = None,
+    ) -> duckdb.DuckDBPyRelation:
         """Extract data from the given file path.
 
+        On first read the CSV is cached next to it as Parquet; subsequent runs
+        scan the smaller, typed Parquet copy and skip CSV parsing entirely.
+
         Args:
             file_path: Path to the CSV file.
+            con: Connection to use; defaults to the pipeline connection.
+            dtypes: Optional column-to-type overrides, skipping type sniffing
+                for those columns. Applied on the CSV read and baked into the
+                Parquet cache.
+            usecols: Optional subset of columns to keep; the projection is pushed into the scan.
 
         Returns:
-            DataFrame containing the extracted data.
+            DuckDB relation containing the extracted data.
         """
-        logging.info(f"Extracting data from {file_path}")
-        return pd.read_csv(file_path)
+        con = con or self.con
+        parquet_path = os.path.splitext(file_path)[0] + ".parquet"
+        if os.path.exists(parquet_path):
+            logging.info(f"Extracting data from cached {parquet_path}")
+            rel = con.read_parquet(parquet_path)
+        else:
+            logging.info(f"Extracting data from {file_path}")
+            rel = con.read_csv(file_path, parallel=True, dtype=dtypes)
+            con.execute(f"COPY (SELECT * FROM rel) TO '{parquet_path}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+            rel = con.read_parquet(parquet_path)
+        if usecols:
+            rel = rel.project(", ".join(f'"{column}"' for column in usecols))
+        return rel
+
+    @staticmethod
+    def _sql_literal(value) -> str:
+        """Render a fill value as a SQL literal.
 
-    def _transform(self, df: pd.DataFrame, transformation_config: dict) -> pd.DataFrame:
-        """Apply transformations to the given DataFrame.
+        Args:
+            value: String or numeric fill value.
+
+        Returns:
+            SQL literal representation of the value.
+        """
+        if isinstance(value, str):
+            escaped = value.replace("'", "''")
+            return f"'{escaped}'"
+        return str(value)
+
+    def _transform(self, rel: duckdb.DuckDBPyRelation, transformation_config: dict) -> duckdb.DuckDBPyRelation:
+        """Apply transformations to the given relation.
 
         Args:
-            df: DataFrame containing the data.
+            rel: DuckDB relation containing the data.
             transformation_config: Dictionary containing transformation rules.
 
         Returns:
-            DataFrame with transformed data.
+            DuckDB relation with transformed data.
         """
         logging.info("Transforming data")
+        # Per-thread view name so concurrently processed tables do not clobber
+        # each other's raw view in the shared catalog.
+        view_name = f"raw_{threading.get_ident()}"
+        projection = "*"
+        fillna_value = transformation_config.get("fillna_value")
+        if fillna_value:
+            if isinstance(fillna_value, dict):
+                fills = fillna_value
+            else:
+                # A scalar sentinel only makes sense for string columns;
+                # filling numeric columns with it would force them to VARCHAR.
+                fills = {
+                    column: fillna_value
+                    for column, column_type in zip(rel.columns, rel.types)
+                    if str(column_type) == "VARCHAR"
+                }
+            projection = ", ".join(
+                f'COALESCE("{column}", {self._sql_literal(fills[column])}) AS "{column}"'
+                if column in fills
+                else f'"{column}"'
+                for column in rel.columns
+            )
+        source = view_name
         if transformation_config.get("duplicates_subset"):
-            df.drop_duplicates(subset=transformation_config["duplicates_subset"], inplace=True)
-        if transformation_config.get("fillna_value"):
-            df.fillna(transformation_config["fillna_value"], inplace=True)
+            # DISTINCT ON runs as a parallel hash aggregate; a row_number()
+            # window over the subset would dedup too but pays for windowing.
+            # String keys hash on DuckDB's inlined string representation, so
+            # they need no dictionary/categorical encoding beforehand.
+            subset = ", ".join(f'"{column}"' for column in transformation_config["duplicates_subset"])
+            source = f"(SELECT DISTINCT ON ({subset}) * FROM {view_name}) AS deduplicated"
+        query = f"SELECT {projection} FROM {source}"
         if transformation_config.get("filter_active"):
-            df = df[df["isActive"]]
-        return df
+            # Evaluated as a vectorized predicate in the same pass as the
+            # projection, with no boolean-mask or row-gather materialization.
+            query += " WHERE isActive"
+        return rel.query(view_name, query)
 
-    def _table_exists(self, table_name: str) -> bool:
+    def _table_exists(self, table_name: str, con: Optional[duckdb.DuckDBPyConnection] = None) -> bool:
         """Check if a table exists in the database.
 
         Args:
             table_name: Name of the table.
+            con: Connection to use; defaults to the pipeline connection.
 
         Returns:
             True if the table exists, False otherwise.
         """
-        query = f"SELECT 1 FROM (SELECT * FROM {table_name}) AS _ LIMIT 0"
-        try:
-            self.con.execute(query)
-            return True
-        except Exception:
-            return False
+        con = con or self.con
+        query = "SELECT 1 FROM duckdb_tables() WHERE table_name = ?"
+        return con.execute(query, [table_name]).fetchone() is not None
 
-    def _load(self, df: pd.DataFrame, table_name: str) -> None:
+    def _load(
+        self, rel: duckdb.DuckDBPyRelation, table_name: str, con: Optional[duckdb.DuckDBPyConnection] = None
+    ) -> None:
         """Load the transformed data into the specified table.
 
         Args:
-            df: DataFrame containing the data to load.
+            rel: DuckDB relation containing the data to load.
             table_name: Name of the table to load the data into.
+            con: Connection to use; defaults to the pipeline connection.
         """
+        if not IDENTIFIER_PATTERN.match(table_name):
+            raise ValueError(f"Invalid table name: {table_name}")
+        con = con or self.con
         logging.info(f"Loading data into {table_name}")
-        if self._table_exists(table_name):
-            logging.warning(f"Table {table_name} already exists. Skip table creation. Only override data.")
-            self.con.register(f"temp_{table_name}", df)
-            self.con.execute(f"DELETE FROM {table_name}")
-            self.con.execute(f"INSERT INTO {table_name} SELECT * FROM temp_{table_name}")
-            self.con.unregister(f"temp_{table_name}")
-            return
-
-        self.con.register(table_name, df)
-        self.con.execute(f"CREATE TABLE {table_name} AS SELECT * FROM {table_name}")
-        self.con.unregister(table_name)
+        if self._table_exists(table_name, con):
+            logging.warning(f"Table {table_name} already exists. Overriding data.")
+        con.execute(f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM rel')
+
+    def _process_one(self, table_name: str, config: dict) -> None:
+        """Run extract, transform and load for a single table on its own connection.
+
+        Args:
+            table_name: Name of the table to process.
+            config: File path and transformation rules for the table.
+        """
+        logging.info(f"Processing {table_name} from {config['file_path']}")
+        con = self.con.cursor()
+        try:
+            # One transaction per table: a single WAL flush on commit, and a
+            # failed table rolls back without leaving partial data behind.
+            con.begin()
+            try:
+                raw_data = self._extract(config["file_path"], con, config.get("dtypes"), config.get("usecols"))
+                cleaned_data = self._transform(raw_data, config["transformation_config"])
+                self._load(cleaned_data, table_name, con)
+                con.commit()
+            except Exception:
+                con.rollback()
+                raise
+        finally:
+            con.close()
 
     def process(self, files: dict = raw_data_files) -> None:
         """Process the specified files using the ETL Pipeline.
 
+        Each table is an independent extract-transform-load, so the tables run
+        concurrently; the heavy work happens in DuckDB with the GIL released.
+
         Args:
             files: Dictionary containing table names and corresponding file paths and transformation rules.
         """
         logging.info("Starting the ETL process")
-        for table_name, config in files.items():
-            logging.info(f"Processing {table_name} from {config['file_path']}")
-            raw_data = self._extract(config["file_path"])
-            cleaned_data = self._transform(raw_data, config["transformation_config"])
-            self._load(cleaned_data, table_name)
+        with ThreadPoolExecutor(max_workers=len(files)) as executor:
+            futures = [executor.submit(self._process_one, table_name, config) for table_name, config in files.items()]
+            for future in futures:
+                future.result()
@@ -1,5 +1,6 @@
 from unittest.mock import MagicMock, patch
 
+import duckdb
 import pandas as pd
 import pytest
 
@@ -14,57 +15,87 @@ def sample_data():
 
 @pytest.fixture
 def pipeline():
-    return ETLPipeline()
+    # Inject a mock connection so tests skip file-backed DuckDB startup
+    return ETLPipeline(con=MagicMock())
 
 
 # Test the extraction method
-def test_extract(pipeline, sample_data):
-    with patch("pandas.read_csv", return_value=sample_data):
-        extracted_data = pipeline._extract("data/sample.csv")
-        assert extracted_data.equals(sample_data)
+def test_extract(pipeline):
+    pipeline._extract("data/sample.csv")
+    pipeline.con.read_csv.assert_called_once_with("data/sample.csv", parallel=True, dtype=None)
+
+
+# Test that a cached Parquet copy is preferred over the CSV
+def test_extract_parquet_cache(pipeline):
+    with patch("os.path.exists", return_value=True):
+        pipeline._extract("data/sample.csv")
+    pipeline.con.read_parquet.assert_called_once_with("data/sample.parquet")
+    pipeline.con.read_csv.assert_not_called()
+
+
+# Test extraction with dtype overrides and a column subset
+def test_extract_with_dtypes_and_usecols(pipeline):
+    pipeline._extract("data/sample.csv", dtypes={"isActive": "BOOLEAN"}, usecols=["column1", "isActive"])
+    pipeline.con.read_csv.assert_called_once_with("data/sample.csv", parallel=True, dtype={"isActive": "BOOLEAN"})
+    pipeline.con.read_parquet.return_value.project.assert_called_once_with('"column1", "isActive"')
 
 
 # Test transformation method
 def test_transform(pipeline):
-    pipeline.con = MagicMock()
+    pipeline.con = duckdb.connect()
     transformation_config = {"duplicates_subset": ["column1"], "fillna_value": "Unknown", "filter_active": True}
-    input_data = pd.DataFrame(
-        {"column1": [1, 1, 2, None], "column2": ["a", "a", "b", "c"], "isActive": [True, True, False, True]}
+    input_rel = pipeline.con.sql(
+        "SELECT * FROM (VALUES (1, 'a', TRUE), (1, 'a', TRUE), (2, 'b', FALSE), (3, NULL, TRUE))"
+        " t(column1, column2, isActive)"
     )
-    output_data = pipeline._transform(input_data, transformation_config)
+    output_data = pipeline._transform(input_rel, transformation_config).df()
     assert len(output_data) == 2
-    assert output_data["column1"].iloc[1] == "Unknown"
+    assert "Unknown" in output_data["column2"].values
     assert output_data["isActive"].all()
 
 
+# Test per-column fill values, including a numeric column kept numeric
+def test_transform_fillna_per_column(pipeline):
+    pipeline.con = duckdb.connect()
+    transformation_config = {"fillna_value": {"column1": 0, "column2": "Unknown"}}
+    input_rel = pipeline.con.sql("SELECT * FROM (VALUES (1, 'a'), (NULL, NULL)) t(column1, column2)")
+    output_data = pipeline._transform(input_rel, transformation_config).df()
+    assert sorted(output_data["column1"]) == [0, 1]
+    assert sorted(output_data["column2"]) == ["Unknown", "a"]
+    assert output_data["column1"].dtype != object
+
+
 # Test for the existence of a table
 def test_table_exists(pipeline):
-    pipeline.con = MagicMock()
-    with patch.object(pipeline.con, "execute", side_effect=[None, Exception()]):
-        assert pipeline._table_exists("existing_table")
-        assert not pipeline._table_exists("non_existing_table")
+    pipeline.con.execute.return_value.fetchone.side_effect = [(1,), None]
+    assert pipeline._table_exists("existing_table")
+    assert not pipeline._table_exists("non_existing_table")
 
 
 # Test for loading data into an existing table
 def test_load_existing_table(pipeline, sample_data):
-    pipeline.con = MagicMock()
     with patch.object(pipeline, "_table_exists", return_value=True):
         pipeline._load(sample_data, "existing_table")
-        pipeline.con.execute.assert_any_call("DELETE FROM existing_table")
-        pipeline.con.execute.assert_any_call("INSERT INTO existing_table SELECT * FROM temp_existing_table")
+        pipeline.con.execute.assert_called_with('CREATE OR REPLACE TABLE "existing_table" AS SELECT * FROM rel')
+        pipeline.con.register.assert_not_called()
 
 
 # Test for loading data into a new table
 def test_load_new_table(pipeline, sample_data):
-    pipeline.con = MagicMock()
     with patch.object(pipeline, "_table_exists", return_value=False):
         pipeline._load(sample_data, "new_table")
-        pipeline.con.execute.assert_called_with("CREATE TABLE new_table AS SELECT * FROM new_table")
+        pipeline.con.execute.assert_called_with('CREATE OR REPLACE TABLE "new_table" AS SELECT * FROM rel')
+
+
+# Test that SQL is never built from an invalid table name
+def test_load_invalid_table_name(pipeline, sample_data):
+    with pytest.raises(ValueError):
+        pipeline._load(sample_data, "bad name; DROP TABLE x")
+    pipeline.con.execute.assert_not_called()
 
 
 # Test for the whole process
 def test_process(pipeline, sample_data):
-    pipeline.con = MagicMock()
     files = {
         "contacts": {
             "file_path": "data/contacts-20230414T185305.csv",